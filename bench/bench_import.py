@@ -0,0 +1,108 @@
+# This file measures how long importing startrace takes in a fresh interpreter, run with:
+#   python bench/bench_import.py [--runs 10] [--budget "import startrace=5000"] [--output import_output.txt]
+# Each scenario is timed with `python -X importtime`, counting only the imports it adds on top of a bare interpreter
+# Results are printed as JSON, and the exit code is 1 if any scenario goes over its --budget (in microseconds)
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+
+
+# Statements timed in a fresh interpreter, by name
+SCENARIOS = {
+    "import startrace": "import startrace",
+    "Pattern": "from startrace import Pattern",
+    "TimeToken": "from startrace import TimeToken; TimeToken('date')",
+    "PatternIndex": "from startrace import PatternIndex",
+    "cli": "import startrace.cli",
+}
+
+
+
+def parse_importtime(stderr: str) -> list:
+    """Return [(depth, name, cumulative_us)] for every line of -X importtime output"""
+    res = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue # Header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        res.append((depth, name.strip(), int(cumulative)))
+    return res
+
+def run_importtime(stmt: str, env: dict) -> list:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", stmt], capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"bench_import: {stmt!r} failed:\n{proc.stderr}")
+    return parse_importtime(proc.stderr)
+
+def measure(stmt: str, baseline: set, env: dict, runs: int) -> dict:
+    """Time stmt runs times, returning the cumulative time of the top-level imports it adds and every module it loads"""
+    totals = []
+    modules = []
+    for _ in range(runs):
+        entries = run_importtime(stmt, env)
+        added = [(depth, name, us) for depth, name, us in entries if name not in baseline]
+        top = min((depth for depth, _, _ in added), default=0)
+        totals.append(sum(us for depth, _, us in added if depth == top))
+        modules = sorted({name for _, name, _ in added})
+    return {
+        "median_us": statistics.median(totals),
+        "min_us": min(totals),
+        "modules": modules,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure startrace import time and print the results as JSON.")
+    parser.add_argument("--runs", type=int, default=10, help="number of fresh interpreters per scenario (median is reported)")
+    parser.add_argument("--budget", action="append", default=[], metavar="SCENARIO=US",
+                        help="fail if the scenario's median import time is over this many microseconds, can be repeated")
+    parser.add_argument("--output", default=None, help="write the JSON to this file instead of stdout")
+    parser.add_argument("--installed", action="store_true", help="measure the installed startrace instead of ./src")
+    args = parser.parse_args(argv)
+
+    budgets = {}
+    for budget in args.budget:
+        name, _, us = budget.rpartition("=")
+        if name not in SCENARIOS or not us.isdigit():
+            parser.error(f"invalid budget: {budget!r} (scenarios are: {', '.join(SCENARIOS)})")
+        budgets[name] = int(us)
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None) # Bytecode is cached in real installs, so don't time compiling
+    if not args.installed:
+        src = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+        env["PYTHONPATH"] = src + os.pathsep + env.get("PYTHONPATH", "")
+
+    baseline = {name for _, name, _ in run_importtime("pass", env)}
+    results = {}
+    for name, stmt in SCENARIOS.items():
+        run_importtime(stmt, env) # Warm up the bytecode cache
+        results[name] = measure(stmt, baseline, env, args.runs)
+
+    over = {name: results[name]["median_us"] for name, us in budgets.items() if results[name]["median_us"] > us}
+    out = json.dumps({
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "runs": args.runs,
+        "results": results,
+        "over_budget": over,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+    return 1 if over else 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+# This file contains benchmarks for the hot paths of star_trace, run with:
+#   python bench/bench_star_trace.py [--repeat 5] [--filter render] [--output bench_output.txt]
+# Results are printed as JSON so they can be compared across releases
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+
+
+
+# Benchmarks
+########################################################################################################################
+
+
+
+# Each benchmark is (name, setup): setup(star_trace) runs once and returns the statement to time and its namespace
+BENCHMARKS = []
+
+def benchmark(name):
+    """Register a benchmark whose setup function returns (stmt, namespace)"""
+    def deco(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return deco
+
+
+
+def _context(st):
+    return {"x": st.Link(10), "y": lambda n: n * 2}
+
+# Token.__new__ routing, one benchmark per argument shape
+@benchmark("new/const")
+def _(st):
+    return "Token('abc')", {"Token": st.Token}
+
+@benchmark("new/list")
+def _(st):
+    return "Token(values)", {"Token": st.Token, "values": [1, 2, 3, 4]}
+
+@benchmark("new/range")
+def _(st):
+    return "Token(1, 100, 1)", {"Token": st.Token}
+
+@benchmark("new/time")
+def _(st):
+    return "Token('datetime')", {"Token": st.Token}
+
+@benchmark("new/time_custom")
+def _(st):
+    return "Token('custom', '%Y%m%d')", {"Token": st.Token}
+
+@benchmark("new/link")
+def _(st):
+    return "Token('y(x())', ctx, True)", {"Token": st.Token, "ctx": _context(st)}
+
+@benchmark("new/dict_const")
+def _(st):
+    return "Token(d)", {"Token": st.Token, "d": {"type": "const", "value": "abc"}}
+
+@benchmark("new/dict_range")
+def _(st):
+    return "Token(d)", {"Token": st.Token, "d": {"type": "range", "start": 1, "end": 100, "step": 1}}
+
+@benchmark("new/dict_link")
+def _(st):
+    return "Token(d, ctx, True, True)", {"Token": st.Token, "d": {"type": "link", "link": "y(x())"}, "ctx": _context(st)}
+
+# Dict-config Pattern construction
+_CONFIG = {
+    "tokens": [
+        {"type": "const", "value": "run_"},
+        {"type": "list", "values": ["us", "eu", "ap"]},
+        {"type": "const", "value": "_"},
+        {"type": "range", "start": 0, "end": 99, "step": 1},
+        {"type": "const", "value": "_"},
+        {"type": "time", "mode": "date"},
+        {"type": "const", "value": ".csv"},
+    ],
+}
+
+@benchmark("construct/dict_pattern")
+def _(st):
+    return "Pattern(config)", {"Pattern": st.Pattern, "config": _CONFIG}
+
+@benchmark("construct/dict_pattern_links")
+def _(st):
+    config = {
+        "tokens": _CONFIG["tokens"] + [{"type": "link", "link": "y(x())"}, {"type": "link", "link": "x()"}],
+    }
+    return "Pattern(config, ctx, True)", {"Pattern": st.Pattern, "config": config, "ctx": _context(st)}
+
+# Pattern.evaluate() per token type, with 8 tokens of the same type so the token cost dominates
+def _render(st, make):
+    pat = st.Pattern([make() for _ in range(8)], _context(st), True)
+    return "pat.evaluate()", {"pat": pat}
+
+@benchmark("render/const")
+def _(st):
+    return _render(st, lambda: st.ConstToken("abc"))
+
+@benchmark("render/list")
+def _(st):
+    return _render(st, lambda: st.ListToken([1, 2, 3]))
+
+@benchmark("render/range")
+def _(st):
+    return _render(st, lambda: st.RangeToken(1, 100, 1))
+
+@benchmark("render/float_range")
+def _(st):
+    return _render(st, lambda: st.RangeToken(0.0, 1.0, 0.01))
+
+@benchmark("render/time")
+def _(st):
+    return _render(st, lambda: st.TimeToken("datetime"))
+
+@benchmark("render/link")
+def _(st):
+    ctx = _context(st)
+    return _render(st, lambda: st.LinkToken("y(x())", ctx, True))
+
+# LinkToken eval cost for a few expression shapes
+@benchmark("link/name")
+def _(st):
+    return "tok.evaluate()", {"tok": st.LinkToken("x", {"x": 10}, True)}
+
+@benchmark("link/call")
+def _(st):
+    return "tok.evaluate()", {"tok": st.LinkToken("x()", _context(st), True)}
+
+@benchmark("link/nested_call")
+def _(st):
+    return "tok.evaluate()", {"tok": st.LinkToken("y(x())", _context(st), True)}
+
+# Pattern.next() enumeration throughput, rendering each combination
+@benchmark("enumerate/next")
+def _(st):
+    pat = st.Pattern([st.ListToken(["a", "b", "c"]), st.RangeToken(0, 999, 1)])
+    return "pat.next()", {"pat": pat}
+
+@benchmark("enumerate/next_evaluate")
+def _(st):
+    pat = st.Pattern([st.ConstToken("f_"), st.ListToken(["a", "b", "c"]), st.ConstToken("_"), st.RangeToken(0, 999, 1)])
+    return "pat.next(); pat.evaluate()", {"pat": pat}
+
+
+
+# Runner
+########################################################################################################################
+
+
+
+def time_benchmark(stmt: str, namespace: dict, repeat: int) -> dict:
+    """Time stmt with timeit, returning per-call timings in nanoseconds"""
+    timer = timeit.Timer(stmt, globals=namespace)
+    number, _ = timer.autorange()
+    runs = [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+    best = min(runs)
+    return {
+        "number": number,
+        "best_ns": best,
+        "mean_ns": sum(runs) / len(runs),
+        "ops_per_sec": 1e9 / best,
+    }
+
+def memory_per_pattern(st, count: int=1000) -> dict:
+    """Measure the traced memory held by count dict-config Patterns, in bytes per Pattern"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        patterns = [st.Pattern(_CONFIG) for _ in range(count)]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del patterns
+    return {"count": count, "bytes_per_pattern": (after - before) / count}
+
+def run(st, version: str=None, repeat: int=5, name_filter: str=None) -> dict:
+    """Run every registered benchmark against the star_trace module st"""
+    results = {}
+    for name, setup in BENCHMARKS:
+        if name_filter and name_filter not in name:
+            continue
+        stmt, namespace = setup(st)
+        results[name] = time_benchmark(stmt, namespace, repeat)
+
+    if not name_filter or name_filter in "memory/pattern":
+        results["memory/pattern"] = memory_per_pattern(st)
+
+    return {
+        "version": version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark star_trace and print the results as JSON.")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timing runs per benchmark (best is reported)")
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this string")
+    parser.add_argument("--output", default=None, help="write the JSON to this file instead of stdout")
+    parser.add_argument("--installed", action="store_true", help="benchmark the installed startrace instead of ./src")
+    args = parser.parse_args(argv)
+
+    if args.installed:
+        from importlib.metadata import version
+        ver = version("startrace")
+    else:
+        sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+        ver = "src"
+    from startrace import star_trace
+
+    res = run(star_trace, ver, args.repeat, args.filter)
+    out = json.dumps(res, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# This file compares the performance of every released startrace wheel, run with:
+#   python bench/compare_versions.py [--min-version 1.0.0] [--repeat 5] [--json compare.json]
+# Each wheel from Legacy/ and dist/ is installed offline into its own temporary venv, then this same
+# file is re-run inside that venv (with --worker) to time a common set of workloads
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+import venv
+
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+WHEEL_DIRS = [os.path.join(ROOT, "Legacy"), os.path.join(ROOT, "dist")]
+
+# Workloads timed in every version, in table order
+WORKLOADS = ["construct", "render", "enumerate"]
+
+
+
+# Worker (runs inside each venv)
+########################################################################################################################
+
+
+
+def _builders(st):
+    """Return (build, render, step) functions for the installed API, all producing 'run_us_0.csv'-style strings"""
+    if hasattr(st, "ConstToken"):
+        # 2.x API
+        def build():
+            return st.Pattern([
+                st.ConstToken("run_"),
+                st.ListToken(["us", "eu", "ap"]),
+                st.ConstToken("_"),
+                st.RangeToken(0, 99, 1),
+                st.ConstToken(".csv"),
+            ])
+        return build, lambda pat: pat.evaluate(), lambda pat: pat.next()
+
+    if hasattr(st.Pattern, "get_pattern"):
+        # 1.x API: a phrase followed by an optional number
+        def build():
+            return st.Pattern([
+                st.Token("run_"),
+                st.Token(["us", "eu", "ap"]),
+                st.Token("_", 0, (0, 99, 1)),
+                st.Token(".csv"),
+            ])
+        return build, lambda pat: pat.get_pattern(), lambda pat: pat.increment()
+
+    raise RuntimeError("unsupported startrace API")
+
+def _time(func, repeat: int) -> float:
+    """Return the best calls per second of func over repeat runs"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(repeat=repeat, number=number))
+
+def run_worker(repeat: int) -> dict:
+    """Time every workload against the installed startrace"""
+    from importlib.metadata import version
+    from startrace import star_trace as st
+
+    build, render, step = _builders(st)
+    pat = build()
+    enum_pat = build()
+
+    def enumerate_one():
+        step(enum_pat)
+        render(enum_pat)
+
+    results = {
+        "construct": _time(build, repeat),
+        "render": _time(lambda: render(pat), repeat),
+        "enumerate": _time(enumerate_one, repeat),
+    }
+
+    count = 1000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    patterns = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del patterns
+
+    return {
+        "version": version("startrace"),
+        "sample": render(build()),
+        "ops_per_sec": results,
+        "bytes_per_pattern": (after - before) / count,
+    }
+
+
+
+# Harness
+########################################################################################################################
+
+
+
+def parse_version(v: str) -> tuple:
+    """Turn '2.0.0b1' into a sortable tuple, with pre-releases before their release"""
+    m = re.match(r"(\d+)\.(\d+)\.(\d+)(?:([a-z]+)(\d+))?", v)
+    if m is None:
+        raise ValueError(f"compare_versions: invalid version: {v}")
+    major, minor, patch, pre, pre_n = m.groups()
+    pre_key = (0, pre, int(pre_n)) if pre else (1, "", 0)
+    return int(major), int(minor), int(patch), pre_key
+
+def find_wheels(min_version: str, include_pre: bool) -> list:
+    """Return [(version, wheel_path)] for every local wheel >= min_version, oldest first"""
+    wheels = {}
+    for d in WHEEL_DIRS:
+        if not os.path.isdir(d):
+            continue
+        for name in os.listdir(d):
+            m = re.match(r"startrace-(.+?)-py3-none-any\.whl$", name)
+            if m is None:
+                continue
+            v = m.group(1)
+            if parse_version(v) < parse_version(min_version):
+                continue
+            if not include_pre and parse_version(v)[3][0] == 0:
+                continue
+            wheels[v] = os.path.join(d, name)
+    return sorted(wheels.items(), key=lambda kv: parse_version(kv[0]))
+
+def run_version(wheel: str, repeat: int, find_links: list) -> dict:
+    """Install wheel into a fresh venv without network access and run the worker in it"""
+    with tempfile.TemporaryDirectory(prefix="startrace-bench-") as env_dir:
+        venv.create(env_dir, with_pip=True)
+        bin_dir = "Scripts" if os.name == "nt" else "bin"
+        python = os.path.join(env_dir, bin_dir, "python")
+
+        cmd = [python, "-m", "pip", "install", "--quiet", "--no-index", "--disable-pip-version-check"]
+        if find_links:
+            for link in find_links:
+                cmd += ["--find-links", link]
+        else:
+            cmd.append("--no-deps")
+        cmd.append(wheel)
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"error": "install failed: " + proc.stderr.strip().splitlines()[-1]}
+
+        # Run from the venv dir so ./src can't shadow the installed package
+        proc = subprocess.run(
+            [python, os.path.abspath(__file__), "--worker", "--repeat", str(repeat)],
+            capture_output=True, text=True, cwd=env_dir,
+        )
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else f"worker exited with {proc.returncode}"}
+        return json.loads(proc.stdout)
+
+def format_table(results: dict) -> str:
+    """Format results as a table of ops/sec and memory, with the change from the previous working version"""
+    header = ["version"] + [f"{w} ops/s" for w in WORKLOADS] + ["bytes/pattern"]
+    rows = [header]
+    prev = None
+    for v, res in results.items():
+        if "error" in res:
+            rows.append([v, f"error: {res['error']}"])
+            continue
+        row = [v]
+        for w in WORKLOADS:
+            cell = f"{res['ops_per_sec'][w]:,.0f}"
+            if prev is not None:
+                cell += f" ({(res['ops_per_sec'][w] / prev['ops_per_sec'][w] - 1) * 100:+.1f}%)"
+            row.append(cell)
+        cell = f"{res['bytes_per_pattern']:,.0f}"
+        if prev is not None:
+            cell += f" ({(res['bytes_per_pattern'] / prev['bytes_per_pattern'] - 1) * 100:+.1f}%)"
+        row.append(cell)
+        rows.append(row)
+        prev = res
+
+    # Error rows just run past the table, so they don't widen the columns
+    widths = [max(len(r[i]) for r in rows if len(r) == len(header)) for i in range(len(header))]
+    lines = []
+    for r in rows:
+        if len(r) < len(header):
+            lines.append("  ".join([r[0].ljust(widths[0])] + r[1:]))
+        else:
+            lines.append("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip())
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the performance of every local startrace wheel.")
+    parser.add_argument("--min-version", default="1.0.0", help="oldest version to include (default 1.0.0)")
+    parser.add_argument("--pre", action="store_true", help="include pre-releases")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timing runs per workload (best is reported)")
+    parser.add_argument("--find-links", action="append", default=[],
+                        help="local directory of wheels used to install dependencies (e.g. numpy for 1.x), can be repeated")
+    parser.add_argument("--json", default=None, help="also write the raw results as JSON to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.repeat)))
+        return 0
+
+    results = {}
+    for v, wheel in find_wheels(args.min_version, args.pre):
+        print(f"benchmarking {v}...", file=sys.stderr)
+        results[v] = run_version(wheel, args.repeat, args.find_links)
+
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
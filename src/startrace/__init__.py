@@ -1 +1,33 @@
-from .star_trace import Iter, Link, Token, ConstToken, RangeToken, ListToken, TimeToken, LinkToken, Pattern
+# Classes are imported from their modules on first use (see __getattr__), so importing startrace stays cheap for
+# short-lived scripts, and optional features only load when they're used
+
+# Module each public name lives in
+_EXPORTS = {
+    "Iter": "star_trace",
+    "Link": "star_trace",
+    "Stats": "star_trace",
+    "Token": "star_trace",
+    "ConstToken": "star_trace",
+    "RangeToken": "star_trace",
+    "ListToken": "star_trace",
+    "TimeToken": "star_trace",
+    "LinkToken": "star_trace",
+    "Pattern": "star_trace",
+    "validate_links": "star_trace",
+    "clear_shared_strings": "star_trace",
+    "PatternIndex": "pattern_index",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(__import__(f"{__name__}.{module}", None, None, [name]), name)
+    globals()[name] = value # Cache, so __getattr__ is only hit once per name
+    return value
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
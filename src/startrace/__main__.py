@@ -0,0 +1,7 @@
+# Allows running the command-line generator with: python -m startrace
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
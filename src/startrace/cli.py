@@ -0,0 +1,283 @@
+# Imports
+########################################################################################################################
+
+
+
+# Used to parse command-line arguments
+import argparse
+
+# Used to load Pattern configs
+import json
+
+# Used to silence stdout when the reader closes the pipe
+import os
+
+# Used to write to stdout/stderr
+import sys
+
+# multiprocessing (for --workers) and hashlib (for --sample) are imported only when those options are used
+
+from .star_trace import Pattern
+
+
+
+# Rendering
+########################################################################################################################
+
+
+
+# Number of combinations rendered per chunk (and per write)
+CHUNK_SIZE = 16384
+
+# Open functions and file suffixes for each compression type, imported on use
+COMPRESSIONS = {
+    "gzip": ("gzip", ".gz"),
+    "bz2": ("bz2", ".bz2"),
+    "xz": ("lzma", ".xz"),
+}
+
+# Pattern built once per process by _init_worker(), and the (threshold, key) used to sample it
+_pattern = None
+_sample = None
+
+_MASK64 = (1 << 64) - 1
+
+def _sample_params(rate: float, seed: str) -> tuple:
+    """Return the (threshold, key) that _sampled() uses to keep rate of all indexes for seed"""
+    import hashlib
+    key = int.from_bytes(hashlib.blake2b(str(seed).encode("utf-8"), digest_size=8).digest(), "little")
+    return int(rate * (1 << 64)), key
+
+def _sampled(indexes, threshold: int, key: int) -> list:
+    """Return the indexes kept by the sample, hashing each (seed, index) pair so the choice never depends on chunking"""
+    # splitmix64 finalizer over the seed key and index
+    res = []
+    for i in indexes:
+        z = (key + (i + 1) * 0x9E3779B97F4A7C15) & _MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        if z ^ (z >> 31) < threshold:
+            res.append(i)
+    return res
+
+def _init_worker(config: dict, allow_eval: bool, sample: tuple) -> None:
+    """Build the pattern for this process, sampling (rate, seed) of its indexes if given"""
+    global _pattern, _sample
+    _pattern = Pattern(config, None, allow_eval)
+    _sample = None if sample is None else _sample_params(*sample)
+
+def _render_chunk(chunk: range) -> bytes:
+    """Render every combination index in chunk (after sampling) as newline-terminated utf-8 lines"""
+    pat = _pattern
+    if _sample is not None:
+        chunk = _sampled(chunk, *_sample)
+        if not chunk:
+            return b""
+
+    lines = []
+    if isinstance(chunk, range) and chunk.step == 1:
+        # Contiguous chunks only need one seek, then next() walks the rest
+        pat.seek(chunk.start)
+        evaluate = pat.evaluate
+        step = pat.next
+        for _ in chunk:
+            lines.append(evaluate())
+            step()
+    else:
+        for i in chunk:
+            pat.seek(i)
+            lines.append(pat.evaluate())
+
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+def _chunks(indexes: range, size: int):
+    """Yield indexes split into ranges of at most size indexes"""
+    step = size * indexes.step
+    for i in range(indexes.start, indexes.stop, step):
+        yield range(i, min(i + step, indexes.stop), indexes.step)
+
+def _shard_chunks(indexes: range, shards: int, size: int):
+    """Yield (shard, chunk) for indexes split into contiguous shards, each split into chunks of at most size indexes"""
+    per_shard = -(-len(indexes) // shards) if len(indexes) else 0
+    for k in range(shards):
+        for chunk in _chunks(indexes[k * per_shard:(k + 1) * per_shard], size):
+            yield k, chunk
+
+def _render_shard_chunk(item: tuple) -> tuple:
+    """Render a (shard, chunk) pair, returning (shard, rendered bytes)"""
+    k, chunk = item
+    return k, _render_chunk(chunk)
+
+def _imap_bounded(pool, func, items, window: int):
+    """Like pool.imap(func, items), but with at most window items in flight so items is only consumed as needed"""
+    from collections import deque
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+
+# Output
+########################################################################################################################
+
+
+
+def _open_output(path: str, compress: str):
+    """Open path for binary writing, compressed if requested"""
+    if compress is None:
+        return open(path, "wb", buffering=1 << 20)
+    module, _ = COMPRESSIONS[compress]
+    return __import__(module).open(path, "wb")
+
+def _shard_path(output: str, shard: int, shards: int, compress: str) -> str:
+    """Return the file path for a shard, filling in {shard} or appending the shard number"""
+    path = output
+    if shards > 1:
+        if "{shard}" in output:
+            path = output.format(shard=shard)
+        else:
+            path = f"{output}.{shard:05d}"
+    if compress is not None:
+        suffix = COMPRESSIONS[compress][1]
+        if not path.endswith(suffix):
+            path += suffix
+    return path
+
+def load_config(path: str) -> dict:
+    """Load a Pattern config from a JSON or YAML file ('-' reads from stdin)"""
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    if path.endswith((".yaml", ".yml")) or (path == "-" and not text.lstrip().startswith(("{", "["))):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("startrace: PyYAML is required for YAML configs (pip install pyyaml).")
+        config = yaml.safe_load(text)
+    else:
+        config = json.loads(text)
+
+    # Allow a bare list of tokens as shorthand for {"tokens": [...]}
+    if isinstance(config, list):
+        config = {"tokens": config}
+    if not isinstance(config, dict) or "tokens" not in config:
+        raise ValueError("startrace: config must be a dict with a 'tokens' key or a list of tokens.")
+    return config
+
+
+
+# Entry point
+########################################################################################################################
+
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="startrace",
+        description="Stream every combination of a Pattern config (the same dict format Pattern() accepts), one per line.",
+    )
+    parser.add_argument("config", help="path to a JSON or YAML Pattern config, or '-' to read it from stdin")
+    parser.add_argument("-o", "--output", default=None,
+                        help="write to this file instead of stdout (use '{shard}' in the name to place the shard number)")
+    parser.add_argument("--start", type=int, default=0, help="first combination index (default 0)")
+    parser.add_argument("--stop", type=int, default=None, help="stop before this combination index (default: all)")
+    parser.add_argument("--step", type=int, default=1, help="only output every step-th combination (default 1)")
+    parser.add_argument("--sample", type=float, default=None, help="randomly keep this fraction (0-1] of combinations")
+    parser.add_argument("--seed", default="0", help="seed for --sample, the same seed always keeps the same combinations (whatever --start, --step, or --shards are)")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="number of processes rendering in parallel (default 1)")
+    parser.add_argument("--shards", type=int, default=1, help="split the output into this many files (requires --output)")
+    parser.add_argument("--compress", choices=sorted(COMPRESSIONS), default=None, help="compress output files")
+    parser.add_argument("--count", action="store_true", help="print the number of combinations and exit")
+    parser.add_argument("--allow-eval", action="store_true",
+                        help="allow LinkTokens to run code (only use with trusted configs), overrides the config's flag")
+    return parser
+
+def main(argv: list=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.shards < 1:
+        parser.error("--shards must be >= 1")
+    if args.shards > 1 and args.output is None:
+        parser.error("--shards requires --output")
+    if args.compress is not None and args.output is None:
+        parser.error("--compress requires --output")
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.step < 1:
+        parser.error("--step must be >= 1")
+    if args.sample is not None and not 0 < args.sample <= 1:
+        parser.error("--sample must be in (0, 1]")
+
+    try:
+        config = load_config(args.config)
+        _init_worker(config, args.allow_eval, None if args.sample is None else (args.sample, args.seed))
+    except Exception as e:
+        parser.exit(2, f"startrace: error: {e}\n")
+
+    total = _pattern.count()
+    if args.count:
+        print(total)
+        return 0
+
+    stop = total if args.stop is None else min(args.stop, total)
+    indexes = range(max(args.start, 0), max(stop, 0), args.step)
+
+    # Contiguous shards, each split into chunks that are rendered (possibly in parallel) in order, generated as they're
+    # needed so output starts right away and memory doesn't grow with the number of combinations
+    chunks = _shard_chunks(indexes, args.shards, CHUNK_SIZE)
+
+    pool = None
+    if args.workers > 1 and (len(indexes) > CHUNK_SIZE or args.shards > 1):
+        import multiprocessing
+        sample = None if args.sample is None else (args.sample, args.seed)
+        pool = multiprocessing.Pool(args.workers, _init_worker, (config, args.allow_eval, sample))
+        blocks = _imap_bounded(pool, _render_shard_chunk, chunks, 4 * args.workers)
+    else:
+        blocks = map(_render_shard_chunk, chunks)
+
+    out = None
+    try:
+        if args.output is None:
+            stdout = sys.stdout.buffer
+            for _, block in blocks:
+                stdout.write(block)
+            stdout.flush()
+        else:
+            shard = -1
+            files = iter(range(args.shards))
+            for k, block in blocks:
+                while shard < k:
+                    shard = next(files)
+                    if out is not None:
+                        out.close()
+                    out = _open_output(_shard_path(args.output, shard, args.shards, args.compress), args.compress)
+                out.write(block)
+            # Shards with nothing in them still get (empty) files
+            for shard in files:
+                if out is not None:
+                    out.close()
+                out = _open_output(_shard_path(args.output, shard, args.shards, args.compress), args.compress)
+    except BrokenPipeError:
+        # The reader (e.g. head) closed the pipe early, which isn't an error
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        # Close the current shard file even if rendering failed, so what was written is flushed
+        if out is not None:
+            out.close()
+        if pool is not None:
+            pool.terminate()
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# Imports
+########################################################################################################################
+
+
+
+# Keeps type hints from being evaluated at runtime, so typing doesn't need to be imported
+from __future__ import annotations
+
+# Used to create type hints (only imported by type checkers)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
+
+from .star_trace import Pattern, ConstToken, ListToken, RangeToken
+
+
+
+# Segments
+########################################################################################################################
+
+
+
+class _ListSegment:
+    """Matches one of a ListToken's strings by hash lookup"""
+
+    def __init__(self, tok: ListToken) -> None:
+        self.lookup = {}
+        for i, string in enumerate(tok.strings):
+            self.lookup.setdefault(string, i) # Duplicate values map to their first index
+        self.lengths = sorted({len(string) for string in self.lookup})
+        self.min_len = self.lengths[0]
+        self.max_len = self.lengths[-1]
+
+    def match(self, key: str, pos: int, end: Optional[int], follow: str):
+        """Yield (end position, token index) for every way this segment can match key at pos"""
+        lookup = self.lookup
+        for n in self.lengths:
+            i = lookup.get(key[pos:pos + n])
+            if i is not None:
+                yield pos + n, i
+
+class _RangeSegment:
+    """Matches a RangeToken value by parsing it and checking it lands on a step"""
+
+    def __init__(self, tok: RangeToken) -> None:
+        self.iter = tok.iter
+
+        # Values can be the type of start or of step (an int start with a float step renders "0", "0.5", ...)
+        self.parsers = []
+        for t in (type(self.iter.start), type(self.iter.step)):
+            if t not in self.parsers:
+                self.parsers.append(t)
+
+        first = str(self.iter.at(0))
+        last = str(self.iter.at(self.iter.last_index))
+        self.min_len = 1
+        # Only ints have a string length bounded by their ends, other types can render with any number of digits
+        self.max_len = None
+        self.chars = frozenset("-0123456789.eE+/")
+        if self.parsers == [int]:
+            self.max_len = max(len(first), len(last))
+            self.chars = frozenset("-0123456789")
+
+    def match(self, key: str, pos: int, end: Optional[int], follow: str):
+        """Yield (end position, token index) for every way this segment can match key at pos, ending at end (if given) and followed by follow"""
+        stop = len(key) if self.max_len is None else min(len(key), pos + self.max_len)
+
+        # Numbers can't contain other characters, so only try substrings within the run of number characters
+        chars = self.chars
+        run = pos
+        while run < stop and key[run] in chars:
+            run += 1
+        stop = run
+
+        if end is not None:
+            ends = (end,) if pos < end <= stop else ()
+        else:
+            ends = range(pos + 1, stop + 1)
+
+        it = self.iter
+        for end in ends:
+            # Parsing is the slow part, so skip ends that aren't followed by the next literal first
+            if follow and not key.startswith(follow, end):
+                continue
+            sub = key[pos:end]
+            for parse in self.parsers:
+                try:
+                    offset = parse(sub) - it.start
+                    i = it._steps(offset)
+                except (ValueError, TypeError, ArithmeticError):
+                    continue
+                # Checking the rendered string rejects off-step values and non-canonical forms like "05" or "+5"
+                if 0 <= i <= it.last_index and str(it.at(i)) == sub:
+                    yield end, i
+                    break
+
+class _PatternMatcher:
+    """Matches strings against one Pattern's output space"""
+
+    def __init__(self, pattern: Pattern) -> None:
+        # Merge runs of ConstTokens into literals, and turn List/Range Tokens into segments
+        parts = []
+        radixes = []
+        for tok in pattern.tokens:
+            if isinstance(tok, ConstToken):
+                if parts and isinstance(parts[-1], str):
+                    parts[-1] += tok.value
+                else:
+                    parts.append(tok.value)
+            elif isinstance(tok, ListToken):
+                parts.append(_ListSegment(tok))
+                radixes.append(len(tok.iter))
+            elif isinstance(tok, RangeToken):
+                parts.append(_RangeSegment(tok))
+                radixes.append(len(tok.iter))
+            else:
+                raise TypeError(f"PatternIndex: {type(tok).__name__} output can't be indexed, only Const, List, and Range Tokens can.")
+
+        self.prefix = ""
+        self.suffix = ""
+        if parts and isinstance(parts[0], str):
+            self.prefix = parts.pop(0)
+        if parts and isinstance(parts[-1], str):
+            self.suffix = parts.pop()
+        self.parts = parts
+
+        # The literal following each segment (if any), used to skip impossible ends before parsing
+        self.follows = [parts[k + 1] if k + 1 < len(parts) and isinstance(parts[k + 1], str) else ""
+                        for k in range(len(parts))]
+
+        # Weight of each segment's index in the combination index (the last token changes fastest)
+        self.weights = []
+        weight = 1
+        for n in reversed(radixes):
+            self.weights.append(weight)
+            weight *= n
+        self.weights.reverse()
+
+        self.min_len = len(self.prefix) + len(self.suffix)
+        self.max_len = self.min_len
+        for part in parts:
+            if isinstance(part, str):
+                self.min_len += len(part)
+                if self.max_len is not None:
+                    self.max_len += len(part)
+            else:
+                self.min_len += part.min_len
+                self.max_len = None if self.max_len is None or part.max_len is None else self.max_len + part.max_len
+
+    def match(self, key: str) -> Optional[int]:
+        """Return the lowest combination index that renders key, or None (key must already start with the prefix)"""
+        if len(key) < self.min_len or (self.max_len is not None and len(key) > self.max_len):
+            return None
+        if not key.endswith(self.suffix):
+            return None
+        end = len(key) - len(self.suffix)
+
+        # Walk the segments keeping every reachable position (and the lowest index reaching it), so there's no backtracking
+        states = {len(self.prefix): 0}
+        seg = 0
+        last = len(self.parts) - 1
+        for k, part in enumerate(self.parts):
+            new_states = {}
+            if isinstance(part, str):
+                for pos, index in states.items():
+                    if key.startswith(part, pos):
+                        new_states[pos + len(part)] = index
+            else:
+                weight = self.weights[seg]
+                seg += 1
+                for pos, index in states.items():
+                    for next_pos, i in part.match(key, pos, end if k == last else None, self.follows[k]):
+                        if next_pos > end:
+                            continue
+                        index_i = index + i * weight
+                        if index_i < new_states.get(next_pos, index_i + 1):
+                            new_states[next_pos] = index_i
+            if not new_states:
+                return None
+            states = new_states
+
+        return states.get(end)
+
+
+
+# Index
+########################################################################################################################
+
+
+
+class PatternIndex:
+    """Answers whether (and where) a string is in the output of a set of Patterns, without enumerating them"""
+
+    def __init__(self, patterns: List[Pattern]) -> None:
+        self.patterns = list(patterns)
+        self._matchers = [_PatternMatcher(pat) for pat in self.patterns]
+
+        # Trie of literal prefixes, each node holds the patterns whose prefix ends there
+        self._trie = {}
+        for n, matcher in enumerate(self._matchers):
+            node = self._trie
+            for c in matcher.prefix:
+                node = node.setdefault(c, {})
+            node.setdefault(None, []).append(n)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __repr__(self) -> str:
+        return f"PatternIndex({self.patterns!r})"
+
+    def __contains__(self, key: str) -> bool:
+        return self.find(key) is not None
+
+
+
+    def _candidates(self, key: str):
+        """Yield the patterns whose literal prefix key starts with"""
+        node = self._trie
+        if None in node:
+            yield from node[None]
+        for c in key:
+            node = node.get(c)
+            if node is None:
+                return
+            if None in node:
+                yield from node[None]
+
+    def find(self, key: str) -> Optional[Tuple[int, int]]:
+        """Return (pattern number, combination index) for the first pattern that can render key, or None"""
+        # The trie yields shorter prefixes first, so sort to try patterns in order
+        for n in sorted(self._candidates(key)):
+            index = self._matchers[n].match(key)
+            if index is not None:
+                return n, index
+        return None
+
+    def find_all(self, key: str) -> List[Tuple[int, int]]:
+        """Return (pattern number, combination index) for every pattern that can render key"""
+        res = []
+        for n in self._candidates(key):
+            index = self._matchers[n].match(key)
+            if index is not None:
+                res.append((n, index))
+        return sorted(res)
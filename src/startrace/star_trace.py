@@ -3,14 +3,36 @@
 
 
 
+# Keeps type hints from being evaluated at runtime, so typing doesn't need to be imported
+from __future__ import annotations
+
 # Used to create abstract token base class
 from abc import ABC, ABCMeta, abstractmethod
 
-# Used to create type hints
-from typing import Any, List, Union
+# Used to create type hints (only imported by type checkers)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterable, List, Union
+
+# Used to time calls when stats are enabled
+from time import perf_counter
+
+# Used to intern ListToken strings
+from sys import intern
+
+# Used to snap float ranges to whole steps within rounding error
+from math import floor, ulp
+
+# Used to get date and time for Date/Time Tokens, imported by _load_datetime() when the first TimeToken is created
+_datetime = None
 
-# Used to get date and time for Date/Time Tokens
-from datetime import datetime
+# asyncio (for Pattern.aevaluate) and operator (for Pattern.render_at) are also imported on first use, to keep imports light
+
+# Names exported by "from startrace.star_trace import *", datetime is resolved by __getattr__ so it's only imported here
+__all__ = [
+    "Iter", "Stats", "Link", "Token", "ConstToken", "ListToken", "RangeToken", "TimeToken", "LinkToken", "Pattern",
+    "validate_links", "clear_shared_strings", "datetime",
+]
 
 
 
@@ -19,76 +41,188 @@ from datetime import datetime
 
 
 
+def _load_datetime():
+    """Import the datetime class on first use and return it"""
+    global _datetime
+    if _datetime is None:
+        from datetime import datetime
+        _datetime = datetime
+    return _datetime
+
+def __getattr__(name: str) -> Any:
+    # Keeps star_trace.datetime working now that it's imported lazily
+    if name == "datetime":
+        return _load_datetime()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _is_awaitable(value: Any) -> bool:
+    """Return True if value can be awaited (coroutines, tasks, futures)"""
+    return hasattr(value, "__await__")
+
 class Iter:
-    """Iterates over a range of values"""
-    value: Any
+    """Iterates over a range of values, stored as a step index so values never drift (value = start + index * step)"""
+    index: int
     start: Any
     end: Any
     step: Any
 
     def __init__(self, value: Any, start: Any, end: Any, step: Any) -> None:
-        self.value = value
         self.start = start
         self.end = end
         self.step = step
+        self.index = 0
 
         self.__post_init__()
 
+        self.value = value
+
     def __post_init__(self):
         if self.step == 0:
             raise ValueError("Iter: step cannot be zero.")
 
+        if self.start > self.end and self.step > 0:
+            raise ValueError("Iter: start must be < end when stepping up.")
+        if self.start < self.end and self.step < 0:
+            raise ValueError("Iter: start must be > end when stepping down.")
+
+        self.last_index = self._steps(self.end - self.start)
+
+    def __len__(self) -> int:
+        return self.last_index + 1
+
+    @property
+    def value(self) -> Any:
+        """The current value, computed from the step index"""
+        return self.at(self.index)
+
+    @value.setter
+    def value(self, value: Any) -> None:
         if self.step > 0:
-            if self.value < self.start:
+            if value < self.start:
                 raise ValueError("Iter: value must be > start.")
-            if self.value > self.end:
+            if value > self.end:
                 raise ValueError("Iter: value must be < end.")
         else:
-            if self.value > self.start:
+            if value > self.start:
                 raise ValueError("Iter: value must be < start.")
-            if self.value < self.end:
+            if value < self.end:
                 raise ValueError("Iter: value must be > end.")
 
-        if self.start > self.end and self.step > 0:
-            raise ValueError("Iter: start must be < end when stepping up.")
-        if self.start < self.end and self.step < 0:
-            raise ValueError("Iter: start must be > end when stepping down.")
+        self.index = self._steps(value - self.start)
+
+    def at(self, index: int) -> Any:
+        """Return the value at a step index, without moving the iterator"""
+        if index == 0:
+            return self.start
+        return self.start + index * self.step
+
+    def _steps(self, offset: Any) -> int:
+        """Return the number of whole steps that fit in offset"""
+        if isinstance(offset, int) and isinstance(self.step, int):
+            return offset // self.step
+
+        n = offset / self.step
+        if isinstance(n, float):
+            # Snap up to the next whole step only if it lands on offset within a few ulps, e.g. 0.3 / 0.1 == 2.9999999999999996
+            k = floor(n) + 1
+            if k - n < 0.5:
+                span = k * self.step
+                if abs(span - offset) <= 4 * ulp(max(abs(span), abs(offset))):
+                    return k
+            return floor(n)
+        return int(n // 1)
 
 
 
     def next(self) -> bool:
         """Increments the current iterator value to the next and returns True if it had space to increment, False otherwise"""
-        if self.step > 0:
-            if self.value < self.end:
-                self.value += self.step
-                return True
-            else:
-                self.value = self.start
-                return False
-        else:
-            if self.value > self.end:
-                self.value += self.step
-                return True
-            else:
-                self.value = self.start
-                return False
+        if self.index < self.last_index:
+            self.index += 1
+            return True
+        self.index = 0
+        return False
 
     def last(self) -> bool:
         """Decrement the current token value to the last and returns True if it had space to decrement, False otherwise"""
-        if self.step > 0:
-            if self.value > self.start:
-                self.value -= self.step
-                return True
-            else:
-                self.value = self.end
-                return False
-        else:
-            if self.value < self.start:
-                self.value -= self.step
-                return True
-            else:
-                self.value = self.end
-                return False
+        if self.index > 0:
+            self.index -= 1
+            return True
+        self.index = self.last_index
+        return False
+
+    def seek(self, index: int) -> None:
+        """Jump straight to the value at index (negative indexes count back from the end)"""
+        if index < 0:
+            index += self.last_index + 1
+        if index < 0 or index > self.last_index:
+            raise IndexError(f"Iter: index {index} out of range.")
+        self.index = index
+
+# Code flag set on async def functions (inspect.CO_COROUTINE, without importing inspect)
+_CO_COROUTINE = 0x80
+
+class Stats:
+    """Collects call counts and timings for instrumented Tokens and Patterns"""
+
+    def __init__(self, callback: Callable[[str, str, float], Any]=None) -> None:
+        self.callback = callback
+        self._records = {}
+
+    def __repr__(self) -> str:
+        return f"Stats({self.snapshot()})"
+
+
+
+    def record(self, key: str, op: str, elapsed: float) -> None:
+        """Add a single timed call of op (evaluate/next/last) under key, then forward it to the callback"""
+        rec = self._records.get((key, op))
+        if rec is None:
+            rec = self._records[(key, op)] = [0, 0.0, 0.0]
+        rec[0] += 1
+        rec[1] += elapsed
+        if elapsed > rec[2]:
+            rec[2] = elapsed
+
+        if self.callback is not None:
+            self.callback(key, op, elapsed)
+
+    def wrap(self, func: Callable, keys: tuple, op: str) -> Callable:
+        """Return func wrapped so every call is timed and recorded under each key (async functions are timed until they finish)"""
+        record = self.record
+
+        if getattr(func, "__code__", None) is not None and func.__code__.co_flags & _CO_COROUTINE:
+            async def atimed(*args, **kwargs):
+                t0 = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    elapsed = perf_counter() - t0
+                    for key in keys:
+                        record(key, op, elapsed)
+
+            return atimed
+
+        def timed(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - t0
+                for key in keys:
+                    record(key, op, elapsed)
+
+        return timed
+
+    def snapshot(self) -> dict:
+        """Return a copy of the collected stats as {key: {op: {"count", "total", "max"}}}"""
+        res = {}
+        for (key, op), (count, total, peak) in self._records.items():
+            res.setdefault(key, {})[op] = {"count": count, "total": total, "max": peak}
+        return res
+
+    def reset(self) -> None:
+        """Clear all collected stats"""
+        self._records.clear()
 
 class Link:
     """A mutable object wrapper for LinkTokens"""
@@ -123,6 +257,14 @@ class Link:
 
 
 
+# Methods that are timed when stats are enabled on a Token or Pattern, as {method: op}
+_STAT_OPS = {"evaluate": "evaluate", "next": "next", "last": "last"}
+
+# Patterns also time async renders, and LinkTokens time resolving and awaiting their link, so each link shows up in
+# async renders too (Pattern.aevaluate() resolves and awaits links itself rather than calling LinkToken.aevaluate())
+_PATTERN_STAT_OPS = {**_STAT_OPS, "aevaluate": "aevaluate"}
+_LINK_STAT_OPS = {**_STAT_OPS, "aevaluate": "aevaluate", "_resolve": "resolve", "_await": "await"}
+
 class TokenMeta(ABCMeta):
     """Metaclass for Token, used to route __new__ to the correct subclass (or at least tell the IDE that's what's happening)"""
 
@@ -164,10 +306,19 @@ class Token(ABC, metaclass=TokenMeta):
                 if a0["type"] == "list":
                     if "values" not in a0:
                         raise TypeError("Token: dict-based input for ListToken must have a 'values' key.")
-                    return ListToken(a0["values"])
+                    return ListToken(a0["values"], a0.get("shared", False))
                 elif a0["type"] == "range":
                     if "start" not in a0 or "end" not in a0 or "step" not in a0:
                         raise TypeError("Token: dict-based input for RangeToken must have 'start', 'end', and 'step' keys.")
+                    if "number" in a0:
+                        # Exact number types, so configs can write {"start": "0.1", ..., "number": "decimal"}
+                        if a0["number"] == "decimal":
+                            from decimal import Decimal as num
+                        elif a0["number"] == "fraction":
+                            from fractions import Fraction as num
+                        else:
+                            raise TypeError(f"Token: dict-based RangeToken invalid number type: {a0['number']}")
+                        return RangeToken(num(str(a0["start"])), num(str(a0["end"])), num(str(a0["step"])))
                     return RangeToken(a0["start"], a0["end"], a0["step"])
                 elif a0["type"] == "time":
                     if "mode" not in a0:
@@ -294,6 +445,40 @@ class Token(ABC, metaclass=TokenMeta):
         """Decrement the current token value to the last and returns True if it had space to decrement, False otherwise."""
         pass
 
+
+
+    _stats = None
+    _stat_ops = _STAT_OPS
+
+    def enable_stats(self, stats: Stats=None) -> Stats:
+        """Start timing evaluate/next/last calls on this token, recording them into stats (or a new Stats) and returning it"""
+        if stats is None:
+            stats = Stats()
+        self.disable_stats()
+
+        # Timed wrappers shadow the class methods on the instance, so disabling just deletes them again
+        keys = self._stats_keys()
+        for name, op in self._stat_ops.items():
+            setattr(self, name, stats.wrap(getattr(self, name), keys, op))
+        self._stats = stats
+        return stats
+
+    def disable_stats(self) -> None:
+        """Stop timing calls on this token, restoring the un-instrumented methods"""
+        for name in self._stat_ops:
+            self.__dict__.pop(name, None)
+        self._stats = None
+
+    def stats(self) -> dict:
+        """Return a snapshot of the stats recorded for this token, or an empty dict if stats are disabled"""
+        if self._stats is None:
+            return {}
+        return self._stats.snapshot()
+
+    def _stats_keys(self) -> tuple:
+        """Return the keys this token's calls are recorded under"""
+        return (type(self).__name__,)
+
 class ConstToken(Token):
     """Token representing a constant string value"""
 
@@ -334,11 +519,23 @@ class ConstToken(Token):
     def last(self) -> bool:
         return False
 
+# String tables of shared ListTokens, so equal value lists across all Patterns in the process share one tuple
+_shared_strings = {}
+
+def clear_shared_strings() -> int:
+    """Drop every shared ListToken string table, returning how many were dropped
+
+    Tables live until this is called (existing tokens keep theirs, new shared tokens start a fresh table)"""
+    count = len(_shared_strings)
+    _shared_strings.clear()
+    return count
+
 class ListToken(Token):
     """Token representing a list of values"""
 
-    def __init__(self, values: List[Any]) -> None:
+    def __init__(self, values: List[Any], shared: bool=False) -> None:
         self.values = values
+        self.shared = shared
         self.iter = Iter(0, 0, len(values) - 1, 1)
 
         self.__post_init__()
@@ -347,10 +544,14 @@ class ListToken(Token):
         if len(self.values) == 0:
             raise ValueError("ListToken: values cannot be empty.")
         try:
-            str(self.values[0])
+            # Values don't change after construction, so stringify them once and just index on evaluate()
+            self.strings = tuple(intern(str(v)) for v in self.values)
         except Exception as e:
             raise TypeError(f"ListToken: values must be castable to a string. Error: {e}")
 
+        if self.shared:
+            self.strings = _shared_strings.setdefault(self.strings, self.strings)
+
     def __str__(self) -> str:
         return self.evaluate()
 
@@ -362,13 +563,19 @@ class ListToken(Token):
 
 
     def to_dict(self) -> dict:
+        if self.shared:
+            return {
+                "type": "list",
+                "values": self.values,
+                "shared": True
+            }
         return {
             "type": "list",
             "values": self.values
         }
 
     def evaluate(self) -> str:
-        return str(self.values[self.iter.value])
+        return self.strings[self.iter.index]
 
     def next(self) -> bool:
         return self.iter.next()
@@ -376,6 +583,9 @@ class ListToken(Token):
     def last(self) -> bool:
         return self.iter.last()
 
+# Exact number types a dict-based RangeToken can use, by class name, as their "number" key
+_RANGE_NUMBERS = {"Decimal": "decimal", "Fraction": "fraction"}
+
 class RangeToken(Token):
     """Token representing a range of values"""
 
@@ -394,7 +604,7 @@ class RangeToken(Token):
         return self.evaluate()
 
     def __len__(self) -> int:
-        return (self.iter.end - self.iter.start) // self.iter.step + 1
+        return len(self.iter)
 
     def __repr__(self) -> str:
         return f'RangeToken({self.iter.start}, {self.iter.end}, {self.iter.step})'
@@ -402,6 +612,17 @@ class RangeToken(Token):
 
 
     def to_dict(self) -> dict:
+        # Exact number types are written as strings with a "number" key, so the dict stays JSON-friendly and round-trips
+        for v in (self.iter.start, self.iter.end, self.iter.step):
+            number = _RANGE_NUMBERS.get(type(v).__name__)
+            if number is not None:
+                return {
+                    "type": "range",
+                    "start": str(self.iter.start),
+                    "end": str(self.iter.end),
+                    "step": str(self.iter.step),
+                    "number": number
+                }
         return {
             "type": "range",
             "start": self.iter.start,
@@ -418,12 +639,97 @@ class RangeToken(Token):
     def last(self) -> bool:
         return self.iter.last()
 
+# strftime directives grouped by the finest part of the time they depend on (1-4 = day/hour/minute/second)
+_TIME_LEVELS = {d: level for level, directives in ((1, "aAwdbBhmyYCjUWGuVxDFe"), (2, "HIpkl"), (3, "MR"), (4, "STXcr")) for d in directives}
+
+# Directives that are plain zero-padded numbers, so _TimeFormat can fill them in without strftime
+_TIME_FIELDS = {"H": ("hour", "%02d"), "M": ("minute", "%02d"), "S": ("second", "%02d"), "f": ("microsecond", "%06d")}
+
+class _TimeFormat:
+    """A strftime format that reuses the formatted day/hour/etc. between consecutive timestamps that share them
+
+    The format is split into numeric fields (%H, %M, %S, %f), filled in with %-formatting on every call, and everything else,
+    which only goes through strftime when the fields it uses change"""
+
+    def __init__(self, fmt: str) -> None:
+        self.fmt = fmt
+
+        # Build the strftime format for the slow parts, with \x01 holding the place of each numeric field
+        self.level = 0
+        slow = ""
+        fields = []
+        i = 0
+        while i < len(fmt):
+            if fmt[i] == "%" and i + 1 < len(fmt):
+                j = i + 1
+                while j < len(fmt) - 1 and fmt[j] in "-_0^#EO":
+                    j += 1
+                d = fmt[j]
+                if j == i + 1 and d in _TIME_FIELDS:
+                    fields.append(_TIME_FIELDS[d])
+                    slow += "\x01"
+                else:
+                    if d != "%":
+                        self.level = max(self.level, _TIME_LEVELS.get(d, 5))
+                    slow += fmt[i:j + 1]
+                i = j + 1
+            else:
+                slow += fmt[i]
+                i += 1
+
+        self._slow = slow
+        self._widths = [width for _, width in fields]
+        names = [name for name, _ in fields]
+        self._fields = lambda ts: tuple([getattr(ts, name) for name in names])
+        if len(names) > 1:
+            from operator import attrgetter
+            self._fields = attrgetter(*names)
+
+        self._key = None
+        self._template = None
+
+        # \x01 in the format itself would be mistaken for a field, so fall back to plain strftime
+        if "\x01" in fmt:
+            self.level = 5
+
+    def format(self, ts: datetime) -> str:
+        """Return ts formatted"""
+        level = self.level
+        if level == 5:
+            # Depends on something other than the date and time fields (e.g. %z), so there's nothing safe to reuse
+            return ts.strftime(self.fmt)
+
+        if level == 0:
+            key = ()
+        elif level == 1:
+            key = (ts.year, ts.month, ts.day)
+        elif level == 2:
+            key = (ts.year, ts.month, ts.day, ts.hour)
+        elif level == 3:
+            key = (ts.year, ts.month, ts.day, ts.hour, ts.minute)
+        else:
+            key = (ts.year, ts.month, ts.day, ts.hour, ts.minute, ts.second)
+
+        if key != self._key or self._template is None:
+            # Re-render the slow parts, then turn them into a %-template for the numeric fields
+            pieces = ts.strftime(self._slow).replace("%", "%%").split("\x01")
+            template = pieces[0]
+            for width, piece in zip(self._widths, pieces[1:]):
+                template += width + piece
+            self._key = key
+            self._template = template
+
+        return self._template % self._fields(ts)
+
 class TimeToken(Token):
     """Token representing a date/time"""
 
-    def __init__(self, mode: str, fmt: str=None) -> None:
+    def __init__(self, mode: str, fmt: str=None, clock: Callable[[], datetime]=None) -> None:
+        _load_datetime()
+
         self.mode = mode
         self.fmt = fmt
+        self.clock = clock
 
         if self.mode == "date":
             self.fmt = "%Y-%m-%d"
@@ -444,7 +750,7 @@ class TimeToken(Token):
             raise ValueError("TimeToken: Custom mode requires a format string.")
         if self.mode == "custom":
             try:
-                datetime.now().strftime(self.fmt)
+                _datetime.now().strftime(self.fmt)
             except Exception as e:
                 raise ValueError(f"TimeToken: Invalid custom format string: {self.fmt}. Error: {e}")
 
@@ -473,8 +779,11 @@ class TimeToken(Token):
             "mode": self.mode
         }
 
-    def evaluate(self) -> str:
-        return datetime.now().strftime(self.fmt)
+    def evaluate(self, at: datetime=None) -> str:
+        """Return the formatted time, using at if given, else the token's clock (datetime.now by default)"""
+        if at is None:
+            at = _datetime.now() if self.clock is None else self.clock()
+        return at.strftime(self.fmt)
 
     def next(self) -> bool:
         return False
@@ -501,15 +810,7 @@ class LinkToken(Token):
             raise ValueError("LinkToken: link cannot be an empty string.")
 
         if self._check_link:
-            try:
-                eval(self._link, {"__builtins__": {}}, self._context)
-            except Exception as e:
-                raise ValueError(f"LinkToken: link '{self._link}' is not a valid expression or is missing context. Error: {e}")
-
-            try:
-                str(eval(self._link, {"__builtins__": {}}, self._context))
-            except Exception as e:
-                raise ValueError(f"LinkToken: value of link '{self._link}' does not have a valid __str__ method. Error: {e}")
+            self.check()
 
     def __str__(self) -> str:
         return self.evaluate()
@@ -530,10 +831,63 @@ class LinkToken(Token):
         }
 
     def evaluate(self) -> str:
+        value = self._resolve()
+        if _is_awaitable(value):
+            if hasattr(value, "close"):
+                value.close()
+            raise RuntimeError(f"LinkToken: link '{self._link}' returned an awaitable, use aevaluate() instead.")
+        return self._str(value)
+
+    async def aevaluate(self) -> str:
+        """Return the string evaluation of the token, awaiting the link's value if it is awaitable"""
+        value = self._resolve()
+        if _is_awaitable(value):
+            return await self._await(value)
+        return self._str(value)
+
+    def check(self) -> None:
+        """Evaluate the link once, raising a ValueError if it fails or its value can't be converted to a string"""
+        try:
+            value = eval(self._link, {"__builtins__": {}}, self._context)
+        except Exception as e:
+            raise ValueError(f"LinkToken: link '{self._link}' is not a valid expression or is missing context. Error: {e}")
+
+        # Async links can only be checked by awaiting them, so close the coroutine instead of leaking it
+        if _is_awaitable(value):
+            if hasattr(value, "close"):
+                value.close()
+            return
+
+        try:
+            str(value)
+        except Exception as e:
+            raise ValueError(f"LinkToken: value of link '{self._link}' does not have a valid __str__ method. Error: {e}")
+
+    _stat_ops = _LINK_STAT_OPS
+
+    def _stats_keys(self) -> tuple:
+        return (type(self).__name__, f"LinkToken[{self._link}]")
+
+    def _resolve(self) -> Any:
+        """Evaluate the link and return the raw value (which may be awaitable)"""
         if not self._eval_allowed:
             raise ValueError("LinkToken: eval_allowed must be True to enable arbitrary code execution.")
         try:
-            return str(eval(self._link, {"__builtins__": {}}, self._context))
+            return eval(self._link, {"__builtins__": {}}, self._context)
+        except Exception as e:
+            raise RuntimeError(f"LinkToken: eval failed for '{self._link}': {e}")
+
+    def _str(self, value: Any) -> str:
+        """Convert a resolved value to a string"""
+        try:
+            return str(value)
+        except Exception as e:
+            raise RuntimeError(f"LinkToken: eval failed for '{self._link}': {e}")
+
+    async def _await(self, value: Any) -> str:
+        """Await a value returned by _resolve() and return it as a string"""
+        try:
+            return str(await value)
         except Exception as e:
             raise RuntimeError(f"LinkToken: eval failed for '{self._link}': {e}")
 
@@ -553,16 +907,22 @@ class LinkToken(Token):
 class Pattern:
     """List of tokens that are joined together to form a pattern"""
 
-    def __init__(self, tokens: Union[List[Any], dict], global_context: dict[str, Any]=None, eval_allowed: bool=None, check_links: bool=True) -> None:
+    def __init__(self, tokens: Union[List[Any], dict], global_context: dict[str, Any]=None, eval_allowed: bool=None, check_links: Union[bool, str]=True, clock: Callable[[], datetime]=None) -> None:
         self._global_context = global_context
         self._eval_allowed = eval_allowed
         self._check_links = check_links
+        self.clock = clock
         self.tokens = []
 
+        # check_links="batch" skips the per-token checks and validates every link once at the end
+        if self._check_links not in (True, False, "batch"):
+            raise ValueError(f"Pattern: check_links must be True, False, or 'batch', not {self._check_links!r}.")
+        check_each = self._check_links is True
+
         if self._global_context is None:
             self._global_context = {}
 
-        if isinstance(tokens, List):
+        if isinstance(tokens, list):
             if self._eval_allowed is None:
                 self._eval_allowed = False
 
@@ -572,11 +932,12 @@ class Pattern:
                     self.tokens.append(tok)
                 # Else send args to Token constructor
                 else:
-                    if "type" in tok and tok["type"] == "link":
+                    if isinstance(tok, dict) and tok.get("type") == "link":
                         ctx = self._global_context
                         if "context" in tok:
                             ctx.update(tok["context"])
-                        self.tokens.append(LinkToken(tok["link"], ctx, self._eval_allowed, self._check_links))
+                        self.tokens.append(LinkToken(tok["link"], ctx, self._eval_allowed, check_each))
+                        continue
                     self.tokens.append(Token(tok))
 
         else: # Assume dict
@@ -593,12 +954,15 @@ class Pattern:
                 # If token is link, we need to pass global context and eval_allowed to Token constructor
                 try:
                     if tok.get("type") == "link":
-                        self.tokens.append(Token(tok, self._global_context, self._eval_allowed, self._check_links))
+                        self.tokens.append(Token(tok, self._global_context, self._eval_allowed, check_each))
                         continue
                 except AttributeError:
                     pass # We can pass here, because Token().__new__ will handle missing dict key errors
                 self.tokens.append(Token(tok))
 
+        if self._check_links == "batch":
+            validate_links([self])
+
     def __str__(self) -> str:
         return self.evaluate()
 
@@ -619,6 +983,13 @@ class Pattern:
     def __sub__(self, other: int) -> None:
         self.__add__(-other)
 
+    async def __aiter__(self):
+        """Asynchronously yield every combination of the pattern, starting from its current state"""
+        while True:
+            yield await self.aevaluate()
+            if not self.next():
+                break
+
 
 
     def to_dict(self) -> dict:
@@ -626,12 +997,142 @@ class Pattern:
             "tokens": self.tokens
         }
 
-    def evaluate(self) -> str:
+    _stats = None
+
+    def enable_stats(self, stats: Stats=None) -> Stats:
+        """Start timing evaluate/aevaluate/next/last calls on the pattern and all of its tokens, recording them into stats (or a new Stats) and returning it
+
+        Pass the same Stats to several Patterns to collect them together, tokens shared between Patterns record into the last one enabled"""
+        if stats is None:
+            stats = Stats()
+        self.disable_stats()
+        for tok in self.tokens:
+            tok.enable_stats(stats)
+        for name, op in _PATTERN_STAT_OPS.items():
+            setattr(self, name, stats.wrap(getattr(self, name), ("Pattern",), op))
+        self._stats = stats
+        return stats
+
+    def disable_stats(self) -> None:
+        """Stop timing calls on the pattern and all of its tokens"""
+        for tok in self.tokens:
+            tok.disable_stats()
+        for name in _PATTERN_STAT_OPS:
+            self.__dict__.pop(name, None)
+        self._stats = None
+
+    def stats(self) -> dict:
+        """Return a snapshot of the stats recorded for this pattern, or an empty dict if stats are disabled"""
+        if self._stats is None:
+            return {}
+        return self._stats.snapshot()
+
+    def evaluate(self, at: datetime=None) -> str:
+        """Return the string evaluation of the pattern, with TimeTokens using at if given, else the pattern's clock (if set)"""
+        if at is None and self.clock is not None:
+            at = self.clock()
+
         res = ""
+        if at is None:
+            for tok in self.tokens:
+                res += str(tok)
+            return res
+
+        # One timestamp for the whole render, so every TimeToken agrees
+        for tok in self.tokens:
+            if isinstance(tok, TimeToken):
+                res += tok.evaluate(at)
+            else:
+                res += str(tok)
+        return res
+
+    def render_at(self, timestamps: Iterable[Union[datetime, float]]) -> List[str]:
+        """Render the pattern once for each timestamp (datetime or POSIX timestamp), with every TimeToken formatting that time
+
+        All other tokens are evaluated once per call, and consecutive timestamps on the same day/hour/etc. reuse the formatted parts they share"""
+        datetime = _load_datetime()
+
+        # Since every TimeToken gets the same time, the whole pattern becomes one format with the other tokens as literal text
+        fmt = ""
         for tok in self.tokens:
-            res += str(tok)
+            if isinstance(tok, TimeToken):
+                fmt += tok.fmt
+            else:
+                fmt += str(tok).replace("%", "%%")
+        time_format = _TimeFormat(fmt)
+
+        res = []
+        for ts in timestamps:
+            if not isinstance(ts, datetime):
+                ts = datetime.fromtimestamp(ts)
+            res.append(time_format.format(ts))
         return res
 
+    async def aevaluate(self, at: datetime=None) -> str:
+        """Return the string evaluation of the pattern, awaiting all async LinkTokens concurrently"""
+        if at is None and self.clock is not None:
+            at = self.clock()
+
+        parts = []
+        pending = []
+        try:
+            for tok in self.tokens:
+                if at is not None and isinstance(tok, TimeToken):
+                    parts.append(tok.evaluate(at))
+                elif isinstance(tok, LinkToken):
+                    value = tok._resolve()
+                    if _is_awaitable(value):
+                        pending.append((len(parts), tok, value))
+                        parts.append("")
+                        continue
+                    parts.append(tok._str(value))
+                else:
+                    parts.append(str(tok))
+        except Exception:
+            # Don't leave already-created coroutines un-awaited
+            for _, _, value in pending:
+                if hasattr(value, "close"):
+                    value.close()
+            raise
+
+        if pending:
+            import asyncio
+            tasks = [asyncio.ensure_future(tok._await(value)) for _, tok, value in pending]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                # gather() leaves the other links running when one fails, so cancel them and collect their errors
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            for (i, _, _), res in zip(pending, results):
+                parts[i] = res
+        return "".join(parts)
+
+    def count(self) -> int:
+        """Return the number of combinations the pattern steps through with next()"""
+        total = 1
+        for tok in self.tokens:
+            if isinstance(tok, (ListToken, RangeToken)):
+                total *= len(tok.iter)
+        return total
+
+    def seek(self, index: int) -> None:
+        """Jump straight to the combination at index, the one reached by calling next() index times from the start"""
+        total = self.count()
+        if index < 0:
+            index += total
+        if index < 0 or index >= total:
+            raise IndexError(f"Pattern: index {index} out of range.")
+
+        # The last token changes fastest, so peel its index off first
+        for tok in reversed(self.tokens):
+            if isinstance(tok, (ListToken, RangeToken)):
+                n = len(tok.iter)
+                tok.iter.seek(index % n)
+                index //= n
+
     def next(self) -> bool:
         for tok in reversed(self.tokens):
             if tok.next():
@@ -642,4 +1143,27 @@ class Pattern:
         for tok in reversed(self.tokens):
             if tok.last():
                 return True
-        return False
\ No newline at end of file
+        return False
+
+
+
+def validate_links(patterns: List[Pattern]) -> None:
+    """Check every LinkToken in patterns in one pass, evaluating each distinct link/context pair once, and raise a single ValueError listing every failure"""
+    checked = set()
+    errors = []
+    for pat in patterns:
+        for tok in pat.tokens:
+            if not isinstance(tok, LinkToken):
+                continue
+            # Patterns built from the same config share one context dict, so each expression only runs once
+            key = (tok._link, id(tok._context))
+            if key in checked:
+                continue
+            checked.add(key)
+            try:
+                tok.check()
+            except ValueError as e:
+                errors.append(str(e))
+
+    if errors:
+        raise ValueError(f"validate_links: {len(errors)} invalid link(s):\n" + "\n".join(errors))
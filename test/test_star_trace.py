@@ -268,4 +268,437 @@ def test_dict():
         "global_context": {},
         "eval_allowed": True
     }
-    pat = Pattern(t_dict, test_context, True)
\ No newline at end of file
+    pat = Pattern(t_dict, test_context, True)
+
+def test_async():
+    import asyncio
+
+    async def read(v, delay):
+        await asyncio.sleep(delay)
+        return v
+
+    delay = 0.2
+    context = {"read": read, "x": Link(5), "delay": delay}
+    pat = Pattern([
+        LinkToken("read('a', delay)", context, True),
+        ConstToken("_"),
+        LinkToken("x()", context, True),
+        ConstToken("_"),
+        LinkToken("read(1.5, delay)", context, True),
+        ListToken([1, 2]),
+    ], context, True)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        res = await pat.aevaluate()
+        # Both reads run concurrently, so the render takes ~1 delay rather than 2
+        assert loop.time() - t0 < 1.5 * delay
+        return res, [s async for s in pat]
+
+    res, combos = asyncio.run(run())
+    assert res == "a_5_1.51"
+    assert combos == ["a_5_1.51", "a_5_1.52"]
+
+    tok = LinkToken("read(2, 0)", context, True)
+    assert asyncio.run(tok.aevaluate()) == "2"
+    with pytest.raises(RuntimeError):
+        tok.evaluate()
+    assert asyncio.run(LinkToken("x()", context, True).aevaluate()) == "5"
+
+    # A failing link closes the coroutines already created, so none are left un-awaited
+    import gc
+    import warnings
+    bad = Pattern([LinkToken("read(1, 0)", context, True), LinkToken("x()", context, True)], context, True)
+    bad.tokens[1]._link = "missing()"
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        with pytest.raises(RuntimeError):
+            asyncio.run(bad.aevaluate())
+        gc.collect()
+    assert not [w for w in caught if "never awaited" in str(w.message)]
+
+    # When one async link fails, the others are cancelled rather than left running
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def fail():
+        raise ValueError("boom")
+
+    context.update(slow=slow, fail=fail)
+    bad = Pattern([LinkToken("slow()", context, True), LinkToken("fail()", context, True)], context, True)
+    with pytest.raises(RuntimeError):
+        asyncio.run(bad.aevaluate())
+    assert cancelled == [True]
+
+    # Values that can't be converted to strings raise the same error as LinkToken.evaluate()
+    class Unprintable:
+        def __str__(self):
+            raise ValueError("no str")
+
+    context["bad_value"] = Unprintable()
+    bad = Pattern([LinkToken("bad_value", context, True, False)], context, True, False)
+    with pytest.raises(RuntimeError, match="eval failed"):
+        asyncio.run(bad.aevaluate())
+
+def test_stats():
+    calls = []
+    context = {"x": Link(3)}
+    pat = Pattern([
+        ConstToken("a"),
+        ListToken([1, 2]),
+        LinkToken("x()", context, True),
+    ], context, True)
+    stats = pat.enable_stats(Stats(lambda key, op, elapsed: calls.append((key, op))))
+    assert isinstance(stats, Stats)
+
+    assert str(pat) == "a13"
+    pat.next()
+    snap = pat.stats()
+    assert snap["Pattern"]["evaluate"]["count"] == 1
+    assert snap["Pattern"]["next"]["count"] == 1
+    assert snap["ListToken"]["evaluate"]["count"] == 1
+    assert snap["LinkToken"]["evaluate"]["count"] == 1
+    assert snap["LinkToken[x()]"]["evaluate"]["count"] == 1
+    assert snap["ConstToken"]["evaluate"]["max"] <= snap["ConstToken"]["evaluate"]["total"]
+    assert ("LinkToken[x()]", "evaluate") in calls
+
+    # Async renders are timed too, with each link's resolve and await recorded separately
+    import asyncio
+
+    async def read():
+        return 4
+
+    context["read"] = read
+    pat.tokens.append(LinkToken("read()", context, True))
+    pat.enable_stats()
+    assert asyncio.run(pat.aevaluate()) == "a234"
+    snap = pat.stats()
+    assert snap["Pattern"]["aevaluate"]["count"] == 1
+    assert snap["LinkToken[x()]"]["resolve"]["count"] == 1
+    assert snap["LinkToken[read()]"]["resolve"]["count"] == 1
+    assert snap["LinkToken[read()]"]["await"]["count"] == 1
+    assert "await" not in snap["LinkToken[x()]"]
+    pat.tokens.pop()
+
+    pat.disable_stats()
+    assert pat.stats() == {}
+    assert "evaluate" not in pat.__dict__
+    assert "evaluate" not in pat.tokens[0].__dict__
+    assert str(pat) == "a23"
+
+    # Several Patterns can record into one Stats
+    shared = Stats()
+    first = Pattern([ConstToken("a")])
+    second = Pattern([ConstToken("b")])
+    assert first.enable_stats(shared) is shared
+    second.enable_stats(shared)
+    first.evaluate()
+    second.evaluate()
+    assert shared.snapshot()["Pattern"]["evaluate"]["count"] == 2
+    assert first.stats() == second.stats()
+
+    tok = ConstToken("b")
+    tok.enable_stats()
+    tok.evaluate()
+    assert tok.stats() == {"ConstToken": {"evaluate": tok.stats()["ConstToken"]["evaluate"]}}
+    assert tok.stats()["ConstToken"]["evaluate"]["count"] == 1
+
+def test_exact_range():
+    from decimal import Decimal
+    from fractions import Fraction
+
+    # Float ranges land exactly on end without accumulating error
+    tok = RangeToken(0.0, 1.0, 0.1)
+    assert len(tok) == 11
+    values = [tok.iter.value]
+    while tok.next():
+        values.append(tok.iter.value)
+    assert len(values) == 11
+    assert values[-1] == 1.0
+    assert tok.iter.value == 0.0
+
+    tok = RangeToken(0.0, 100000.0, 0.1)
+    tok.iter.seek(-1)
+    assert tok.iter.value == 100000.0
+    assert tok.next() == False
+    assert tok.last() == False
+    assert tok.iter.index == len(tok) - 1
+
+    # Long ranges whose end is just below a step don't snap past it
+    tok = RangeToken(0.0, 29999999.995, 1.0)
+    assert len(tok) == 30000000
+    tok.iter.seek(-1)
+    assert tok.iter.value == 29999999.0
+    tok = RangeToken(0.0, 1e10, 0.5)
+    assert len(tok) == 2 * 10 ** 10 + 1
+
+    # The end is not overshot when it isn't on a step
+    tok = RangeToken(1, 12, 4)
+    assert len(tok) == 3
+    assert tok.next() and tok.next()
+    assert tok.evaluate() == "9"
+    assert tok.next() == False
+
+    tok = RangeToken(Decimal("0.1"), Decimal("1.0"), Decimal("0.1"))
+    assert len(tok) == 10
+    tok.iter.seek(2)
+    assert tok.evaluate() == "0.3"
+
+    tok = Token({"type": "range", "start": "1/3", "end": 2, "step": "1/3", "number": "fraction"})
+    assert len(tok) == 6
+    tok.iter.seek(5)
+    assert tok.iter.value == Fraction(2)
+
+    assert tok.to_dict() == {"type": "range", "start": "1/3", "end": "2", "step": "1/3", "number": "fraction"}
+
+    # Exact ranges serialize to JSON and build the same token back
+    import json
+    for tok in (RangeToken(Decimal("0.1"), 1, Decimal("0.1")), RangeToken(0, 1, Fraction(1, 4)), RangeToken(0.0, 1.0, 0.5)):
+        copy = Token(json.loads(json.dumps(tok.to_dict())))
+        assert repr(copy) == repr(tok)
+        assert len(copy) == len(tok)
+
+    with pytest.raises(IndexError):
+        tok.iter.seek(6)
+    with pytest.raises(TypeError):
+        Token({"type": "range", "start": 0, "end": 1, "step": 1, "number": "complex"})
+
+def test_seek():
+    pat = Pattern([ConstToken("f"), ListToken(["a", "b", "c"]), RangeToken(0, 3, 1), TimeToken("date")])
+    assert pat.count() == 12
+    combos = []
+    while True:
+        combos.append(pat.evaluate())
+        if not pat.next():
+            break
+    for i in (0, 5, 11, -1):
+        pat.seek(i)
+        assert pat.evaluate() == combos[i]
+    with pytest.raises(IndexError):
+        pat.seek(12)
+
+def test_cli(tmp_path, capsysbinary, monkeypatch):
+    import gzip
+    import json
+    from startrace.cli import main
+
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"tokens": [
+        {"type": "const", "value": "f_"},
+        {"type": "list", "values": ["a", "b"]},
+        {"type": "range", "start": 0, "end": 2, "step": 1},
+    ]}))
+    all_lines = [f"f_{x}{i}" for x in "ab" for i in range(3)]
+
+    assert main([str(config)]) == 0
+    assert capsysbinary.readouterr().out.decode().splitlines() == all_lines
+
+    assert main([str(config), "--start", "1", "--stop", "5", "--step", "2"]) == 0
+    assert capsysbinary.readouterr().out.decode().splitlines() == ["f_a1", "f_b0"]
+
+    main([str(config), "--sample", "0.5", "--seed", "7"])
+    sampled = capsysbinary.readouterr().out.decode().splitlines()
+    main([str(config), "--sample", "0.5", "--seed", "7", "--workers", "2"])
+    assert capsysbinary.readouterr().out.decode().splitlines() == sampled
+    assert set(sampled) <= set(all_lines)
+
+    out = tmp_path / "out-{shard}.txt"
+    assert main([str(config), "-o", str(out), "--shards", "2", "--compress", "gzip", "--workers", "2"]) == 0
+    shards = [gzip.open(tmp_path / f"out-{k}.txt.gz").read().decode().splitlines() for k in range(2)]
+    assert shards == [all_lines[:3], all_lines[3:]]
+
+    with pytest.raises(SystemExit):
+        main([str(config), "--shards", "2"])
+
+    # Chunks are generated lazily, so huge ranges start right away
+    from startrace import cli
+    chunks = cli._shard_chunks(range(10 ** 13), 3, cli.CHUNK_SIZE)
+    assert next(chunks) == (0, range(0, cli.CHUNK_SIZE))
+
+    # A render error still closes (and flushes) the current output file
+    render = cli._render_chunk
+    calls = []
+    def failing(chunk):
+        calls.append(chunk)
+        if len(calls) > 1:
+            raise RuntimeError("render failed")
+        return render(chunk)
+    monkeypatch.setattr(cli, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(cli, "_render_chunk", failing)
+    out = tmp_path / "partial.txt"
+    with pytest.raises(RuntimeError):
+        main([str(config), "-o", str(out), "--compress", "gzip"])
+    assert gzip.open(tmp_path / "partial.txt.gz").read().decode().splitlines() == all_lines[:2]
+    monkeypatch.undo()
+
+    # Sampling keeps the same combinations however the indexes are started, stepped, or sharded
+    config.write_text(json.dumps({"tokens": [
+        {"type": "list", "values": ["a", "b"]},
+        {"type": "range", "start": 0, "end": 2999, "step": 1},
+    ]}))
+    all_lines = [f"{x}{i}" for x in "ab" for i in range(3000)]
+    assert main([str(config), "--sample", "0.5", "--seed", "3"]) == 0
+    sampled = capsysbinary.readouterr().out.decode().splitlines()
+    assert 2500 < len(sampled) < 3500
+    kept = set(sampled)
+
+    out = tmp_path / "sample-{shard}.txt"
+    assert main([str(config), "-o", str(out), "--shards", "3", "--sample", "0.5", "--seed", "3"]) == 0
+    assert sum((open(tmp_path / f"sample-{k}.txt").read().splitlines() for k in range(3)), []) == sampled
+
+    assert main([str(config), "--start", "100", "--sample", "0.5", "--seed", "3"]) == 0
+    assert capsysbinary.readouterr().out.decode().splitlines() == [s for s in all_lines[100:] if s in kept]
+
+    assert main([str(config), "--step", "3", "--sample", "0.5", "--seed", "3"]) == 0
+    assert capsysbinary.readouterr().out.decode().splitlines() == [s for s in all_lines[::3] if s in kept]
+
+def test_batch_links():
+    calls = []
+    def f(n):
+        calls.append(n)
+        return n
+
+    context = {"f": f}
+    config = {"tokens": [
+        {"type": "link", "link": "f(1)"},
+        {"type": "const", "value": "_"},
+        {"type": "link", "link": "f(2)"},
+    ]}
+
+    # Each link is evaluated once when checked
+    Pattern(config, context, True)
+    assert calls == [1, 2]
+
+    # List configs only build each LinkToken once
+    calls.clear()
+    pat = Pattern(config["tokens"], context, True)
+    assert len(pat) == 3
+    assert calls == [1, 2]
+
+    # Batched checks only evaluate each distinct link once across all patterns
+    calls.clear()
+    pats = [Pattern(config, context, True, False) for _ in range(10)]
+    assert calls == []
+    validate_links(pats)
+    assert calls == [1, 2]
+
+    calls.clear()
+    Pattern(config, context, True, "batch")
+    assert calls == [1, 2]
+
+    # All failures are reported together
+    bad = {"tokens": [
+        {"type": "link", "link": "g()"},
+        {"type": "link", "link": "f(1)"},
+        {"type": "link", "link": "h()"},
+    ]}
+    with pytest.raises(ValueError) as e:
+        Pattern(bad, context, True, "batch")
+    assert "2 invalid link(s)" in str(e.value)
+    assert "'g()'" in str(e.value) and "'h()'" in str(e.value)
+
+    with pytest.raises(ValueError):
+        Pattern(config, context, True, "later")
+
+def test_list_strings():
+    tok = ListToken([1, "b", 2.5])
+    assert tok.strings == ("1", "b", "2.5")
+    tok.next()
+    assert tok.evaluate() is tok.strings[1]
+
+    a = ListToken(["us-east", "eu-west"], True)
+    b = Token({"type": "list", "values": ["us-east", "eu-west"], "shared": True})
+    c = ListToken(["us-east", "eu-west"])
+    assert a.strings is b.strings
+    assert c.strings == a.strings and c.strings is not a.strings
+    assert c.strings[0] is a.strings[0]
+    assert b.to_dict() == {"type": "list", "values": ["us-east", "eu-west"], "shared": True}
+
+    assert clear_shared_strings() >= 1
+    assert clear_shared_strings() == 0
+    d = ListToken(["us-east", "eu-west"], True)
+    assert d.strings == a.strings and d.strings is not a.strings
+    assert ListToken(["us-east", "eu-west"], True).strings is d.strings
+
+def test_pattern_index():
+    from decimal import Decimal
+    from startrace import PatternIndex
+
+    pats = [
+        Pattern([ConstToken("host-"), ListToken(["a", "ab", "b"]), RangeToken(0, 120, 3), ConstToken(".log")]),
+        Pattern([ConstToken("host-"), RangeToken(-5, 5, 1), ListToken(["", "x"])]),
+        Pattern([RangeToken(0.0, 1.0, 0.1), ConstToken("_"), RangeToken(Decimal("0.5"), Decimal("2"), Decimal("0.25"))]),
+    ]
+    index = PatternIndex(pats)
+    assert len(index) == 3
+
+    # Every combination is found, at an index that renders it
+    for n, pat in enumerate(pats):
+        for i in range(pat.count()):
+            pat.seek(i)
+            key = pat.evaluate()
+            assert key in index
+            found = index.find_all(key)
+            assert (n, i) in found
+            for m, j in found:
+                pats[m].seek(j)
+                assert pats[m].evaluate() == key
+
+    for key in ["host-c3.log", "host-a4.log", "host-a123.log", "host-6", "host-05", "host-+5", "0.05_0.5", "", "1.0_2.25"]:
+        assert key not in index
+        assert index.find(key) is None
+
+    # find() returns the lowest pattern number, even when a later pattern has a shorter prefix
+    index = PatternIndex([Pattern([ConstToken("ab"), ListToken(["c"])]), Pattern([ListToken(["abc"])])])
+    assert index.find("abc") == (0, 0)
+    assert index.find_all("abc") == [(0, 0), (1, 0)]
+
+    with pytest.raises(TypeError):
+        PatternIndex([Pattern([ConstToken("a"), TimeToken("date")])])
+
+def test_time_clock():
+    from datetime import timedelta
+
+    fixed = datetime(2025, 1, 2, 3, 4, 5)
+    tok = TimeToken("datetime", clock=lambda: fixed)
+    assert tok.evaluate() == "2025-01-02_03:04:05"
+    assert tok.evaluate(datetime(2020, 6, 7)) == "2020-06-07_00:00:00"
+
+    pat = Pattern([ConstToken("run_"), TimeToken("date"), ConstToken("_"), TimeToken("time")], clock=lambda: fixed)
+    assert pat.evaluate() == "run_2025-01-02_03:04:05"
+    assert str(pat) == "run_2025-01-02_03:04:05"
+    assert pat.evaluate(datetime(1999, 12, 31, 23, 59, 59)) == "run_1999-12-31_23:59:59"
+
+    pat = Pattern([
+        ConstToken("100%_"),
+        TimeToken("date"),
+        ListToken(["a", "b"]),
+        TimeToken("custom", "%H%% %M:%S.%f %a"),
+    ])
+    stamps = [fixed + timedelta(seconds=977 * i, microseconds=i) for i in range(500)]
+    assert pat.render_at(stamps) == [pat.evaluate(ts) for ts in stamps]
+    assert pat.render_at([fixed.timestamp()]) == [pat.evaluate(fixed)]
+    assert Pattern([TimeToken("custom", "%Y%z")]).render_at([fixed]) == [fixed.strftime("%Y%z")]
+    pat = Pattern([ConstToken("a\x01b"), TimeToken("time")])
+    assert pat.render_at([fixed]) == [pat.evaluate(fixed)] == ["a\x01b03:04:05"]
+
+def test_lazy_import():
+    import subprocess
+
+    # Importing startrace (or its core classes) shouldn't pull in datetime, typing, or asyncio
+    src = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+    code = (
+        "import sys; import startrace; from startrace import Pattern, ConstToken; Pattern([ConstToken('a')]).evaluate(); "
+        "print(sorted(m for m in ('datetime', 'typing', 'asyncio', 'startrace.pattern_index') if m in sys.modules)); "
+        "from startrace import TimeToken; TimeToken('date'); print('datetime' in sys.modules)"
+    )
+    env = dict(os.environ, PYTHONPATH=src)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True).stdout
+    assert out.splitlines() == ["[]", "True"]